@@ -1,10 +1,15 @@
 import asyncio
+import hmac
 import logging
 import os
+import re
 from typing import Optional
 
 import httpx
 from fastapi import Depends, FastAPI, Header, HTTPException, status
+from fastapi.responses import ORJSONResponse
+
+from app.classify import category as heuristic_category, priority as heuristic_priority
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("agent-service")
@@ -16,11 +21,27 @@ AI_API_KEY = os.getenv("AI_API_KEY")
 AI_API_BASE = os.getenv("AI_API_BASE")
 CALENDAR_API_BASE = os.getenv("CALENDAR_API_BASE", "")
 
-app = FastAPI(title="CampuSupport Agent", version="0.1.0")
+CALENDAR_RE = re.compile(r"randevu|danisman", re.IGNORECASE)
+
+app = FastAPI(title="CampuSupport Agent", version="0.1.0", default_response_class=ORJSONResponse)
+
+
+@app.on_event("startup")
+async def startup_event():
+    app.state.http = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0),
+        http2=True,
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.http.aclose()
 
 
 def require_agent_secret(x_agent_key: str = Header(None)):
-    if not x_agent_key or x_agent_key != AGENT_SHARED_SECRET:
+    if not x_agent_key or not hmac.compare_digest(x_agent_key.encode(), AGENT_SHARED_SECRET.encode()):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid agent key")
     return True
 
@@ -32,10 +53,9 @@ def health():
 
 async def call_ticket_service(path: str, method: str = "GET", json: Optional[dict] = None):
     headers = {"X-Internal-Secret": INTERNAL_SECRET}
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.request(method, f"{TICKET_SERVICE_URL}{path}", headers=headers, json=json)
-        resp.raise_for_status()
-        return resp.json()
+    resp = await app.state.http.request(method, f"{TICKET_SERVICE_URL}{path}", headers=headers, json=json)
+    resp.raise_for_status()
+    return resp.json()
 
 
 async def call_ai(prompt: str, purpose: str) -> Optional[str]:
@@ -43,41 +63,21 @@ async def call_ai(prompt: str, purpose: str) -> Optional[str]:
         logger.info("agent.ai.skip", extra={"purpose": purpose, "reason": "no_api_key"})
         return None
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(
-                AI_API_BASE,
-                headers={"Authorization": f"Bearer {AI_API_KEY}"},
-                json={"input": prompt, "purpose": purpose},
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            logger.info("agent.ai.ok", extra={"purpose": purpose})
-            return data.get("result") or data.get("text")
+        resp = await app.state.http.request(
+            "POST",
+            AI_API_BASE,
+            headers={"Authorization": f"Bearer {AI_API_KEY}"},
+            json={"input": prompt, "purpose": purpose},
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        logger.info("agent.ai.ok", extra={"purpose": purpose})
+        return data.get("result") or data.get("text")
     except Exception as exc:  # noqa: BLE001
         logger.warning("agent.ai.fail", extra={"purpose": purpose, "error": str(exc)})
         return None
 
 
-def heuristic_priority(text: str) -> str:
-    lowered = text.lower()
-    if any(k in lowered for k in ["acil", "urgent", "kopuyor", "kilit", "down", "calismiyor"]):
-        return "high"
-    if any(k in lowered for k in ["yavas", "gecik", "slow"]):
-        return "medium"
-    return "low"
-
-
-def heuristic_category(text: str) -> str:
-    lowered = text.lower()
-    if any(k in lowered for k in ["wifi", "internet", "lms", "vpn", "modem"]):
-        return "Internet"
-    if any(k in lowered for k in ["projeksiyon", "monitor", "ekran", "donanim", "bilgisayar", "lab"]):
-        return "Donanim"
-    if any(k in lowered for k in ["randevu", "danisman", "kayit", "transkript", "ogrenci"]):
-        return "Ogrenci Islemleri"
-    return "Genel"
-
-
 def pick_unit(category: str) -> str:
     mapping = {
         "Internet": "Network",
@@ -88,19 +88,18 @@ def pick_unit(category: str) -> str:
 
 
 async def mock_calendar_flow(description: str) -> Optional[str]:
-    if not any(k in description.lower() for k in ["randevu", "danisman"]):
+    if not CALENDAR_RE.search(description):
         return None
     logger.info("agent.calendar.check", extra={"desc": description})
     # If external calendar API configured, call it; otherwise return stub.
     if CALENDAR_API_BASE:
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(f"{CALENDAR_API_BASE}/slots?service=advisor")
-                resp.raise_for_status()
-                data = resp.json()
-                slot = data.get("slots", ["2025-01-10 10:00"])[0]
-                logger.info("agent.calendar.ok", extra={"slot": slot})
-                return slot
+            resp = await app.state.http.request("GET", f"{CALENDAR_API_BASE}/slots?service=advisor")
+            resp.raise_for_status()
+            data = resp.json()
+            slot = data.get("slots", ["2025-01-10 10:00"])[0]
+            logger.info("agent.calendar.ok", extra={"slot": slot})
+            return slot
         except Exception as exc:  # noqa: BLE001
             logger.warning("agent.calendar.fail", extra={"error": str(exc)})
     slot = "2025-01-10 10:00"
@@ -121,17 +120,27 @@ async def process_ticket(
         raise HTTPException(status_code=502, detail="Ticket service unreachable")
 
     user_id = ticket.get("created_by_id")
-    try:
-        summary = await call_ticket_service(f"/internal/users/{user_id}/tickets/summary")
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("agent.summary.fail", extra={"user_id": user_id, "error": str(exc)})
-        summary = {"total": 0, "recent_ids": [], "recent_titles": []}
-
     description = ticket.get("description", "")
-    ai_text = await call_ai(
-        f"Ticket aciklamasina gore kategori ve oncelik belirle: {description}. Sonuc: kategori, oncelik.",
-        purpose="agent-classify",
+    # Summary, classification and calendar lookup are independent; run them concurrently
+    summary, ai_text, slot = await asyncio.gather(
+        call_ticket_service(f"/internal/users/{user_id}/tickets/summary"),
+        call_ai(
+            f"Ticket aciklamasina gore kategori ve oncelik belirle: {description}. Sonuc: kategori, oncelik.",
+            purpose="agent-classify",
+        ),
+        mock_calendar_flow(description),
+        return_exceptions=True,
     )
+    if isinstance(summary, BaseException):
+        logger.warning("agent.summary.fail", extra={"user_id": user_id, "error": str(summary)})
+        summary = {"total": 0, "recent_ids": [], "recent_titles": []}
+    if isinstance(ai_text, BaseException):
+        logger.warning("agent.ai.fail", extra={"purpose": "agent-classify", "error": str(ai_text)})
+        ai_text = None
+    if isinstance(slot, BaseException):
+        logger.warning("agent.calendar.fail", extra={"error": str(slot)})
+        slot = None
+
     if ai_text and "," in ai_text:
         parts = [p.strip() for p in ai_text.split(",")]
         category = parts[0] or heuristic_category(description)
@@ -142,7 +151,6 @@ async def process_ticket(
 
     assigned_unit = pick_unit(category)
 
-    slot = await mock_calendar_flow(description)
     sla_hint = "SLA: 24 saat"
     msg = f"Talebiniz {assigned_unit} birimine yonlendirildi. {sla_hint}. Oncelik: {priority}."
     if slot:
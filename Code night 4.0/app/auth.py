@@ -1,27 +1,49 @@
-from datetime import datetime, timedelta
+import functools
+import time
+from datetime import timedelta
 from typing import Dict, Optional
 
+import jwt
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
 from passlib.context import CryptContext
 
 from .config import settings
 
-# pbkdf2_sha256 keeps setup simple and avoids bcrypt backend quirks on some systems
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# argon2 (C backend via argon2-cffi) with a fixed cost; pbkdf2_sha256 stays verifiable and is rehashed on login
+pwd_context = CryptContext(
+    schemes=["argon2", "pbkdf2_sha256"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+_SECRET = settings.secret_key
+_ALG = settings.algorithm
+_DEFAULT_DELTA = timedelta(minutes=settings.access_token_expire_minutes)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, bulk: bool = False) -> str:
+    # bulk=True reuses one hash (and salt) per plaintext; only for seed/bulk provisioning, never user signup
+    if bulk:
+        return _hash_cached(password)
+    return pwd_context.hash(password)
+
+
+@functools.lru_cache(maxsize=128)
+def _hash_cached(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    exp = int(time.time()) + int((expires_delta or _DEFAULT_DELTA).total_seconds())
+    return jwt.encode({**data, "exp": exp}, _SECRET, algorithm=_ALG)
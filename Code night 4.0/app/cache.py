@@ -0,0 +1,146 @@
+"""Response cache for list/report endpoints with namespace-level invalidation.
+
+Entries live in Redis when REDIS_URL is set, otherwise in process memory. Each namespace carries a
+version counter that is part of every key, so invalidating a namespace is a single increment.
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import orjson
+import redis
+from cachetools import TLRUCache
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import SQLAlchemyError
+
+from .config import settings
+
+logger = logging.getLogger("campusupport")
+
+# TTL tiers in seconds
+SHORT_TTL = 15
+NORMAL_TTL = 30
+LONG_TTL = 60
+# Model output for identical input does not go stale, so AI results are kept for a day
+AI_TTL = 24 * 60 * 60
+# Last good value per key, served with a Warning header if the database fails
+STALE_TTL = 60 * 60
+
+KEY_PREFIX = "cs"
+REDIS_BACKOFF_SECONDS = 5
+
+
+def _entry_expiry(key: str, entry: tuple, now: float) -> float:
+    return now + entry[0]
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int = 4096):
+        # Entries are (ttl, value) pairs, each expiring on its own TTL
+        self._entries: TLRUCache = TLRUCache(maxsize=maxsize, ttu=_entry_expiry)
+        self._versions: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (ttl, value)
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def bump(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+
+class RedisBackend:
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._retry_at = 0.0
+
+    def _run(self, op: str, default: Any, call: Callable[[], Any]) -> Any:
+        # After a failure, skip Redis for a short window so a hung server costs one timeout, not one per call
+        if time.monotonic() < self._retry_at:
+            return default
+        try:
+            return call()
+        except redis.RedisError as exc:
+            self._retry_at = time.monotonic() + REDIS_BACKOFF_SECONDS
+            logger.warning(f"cache.{op}.failed", extra={"error": str(exc)})
+            return default
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._run("get", None, lambda: self._client.get(key))
+        return orjson.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self._run("set", None, lambda: self._client.set(key, orjson.dumps(value), ex=ttl))
+
+    def version(self, key: str) -> int:
+        return int(self._run("version", None, lambda: self._client.get(key)) or 0)
+
+    def bump(self, *keys: str) -> None:
+        def incr_all():
+            pipe = self._client.pipeline(transaction=False)
+            for key in keys:
+                pipe.incr(key)
+            pipe.execute()
+
+        self._run("bump", None, incr_all)
+
+
+backend = RedisBackend(settings.redis_url) if settings.redis_url else MemoryBackend()
+
+
+def _params_digest(key_parts: tuple) -> str:
+    return hashlib.sha1(repr(key_parts).encode()).hexdigest()
+
+
+def _versioned_key(namespace: str, digest: str) -> str:
+    version = backend.version(f"{KEY_PREFIX}:{namespace}:version")
+    return f"{KEY_PREFIX}:{namespace}:v{version}:{digest}"
+
+
+def lookup(namespace: str, key_parts: tuple) -> Optional[Any]:
+    return backend.get(_versioned_key(namespace, _params_digest(key_parts)))
+
+
+def store(namespace: str, key_parts: tuple, value: Any, ttl: int) -> None:
+    backend.set(_versioned_key(namespace, _params_digest(key_parts)), value, ttl)
+
+
+def cached(namespace: str, key_parts: tuple, ttl: int, compute: Callable[[], Any], response: Response) -> Any:
+    """Return the cached JSON-ready value for (namespace, key_parts), computing and storing it on a miss."""
+    digest = _params_digest(key_parts)
+    key = _versioned_key(namespace, digest)
+    stale_key = f"{KEY_PREFIX}:stale:{namespace}:{digest}"
+
+    value = backend.get(key)
+    if value is not None:
+        return value
+    try:
+        value = jsonable_encoder(compute())
+    except SQLAlchemyError:
+        stale = backend.get(stale_key)
+        if stale is None:
+            raise
+        logger.warning("cache.stale.served", extra={"namespace": namespace})
+        response.headers["Warning"] = '110 - "Response is Stale"'
+        return stale
+    backend.set(key, value, ttl)
+    backend.set(stale_key, value, STALE_TTL)
+    return value
+
+
+def invalidate(*namespaces: str) -> None:
+    backend.bump(*(f"{KEY_PREFIX}:{namespace}:version" for namespace in namespaces))
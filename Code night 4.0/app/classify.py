@@ -0,0 +1,33 @@
+"""Keyword heuristics shared by the ticket service and the agent service.
+
+Kept dependency-free and fully annotated so it can be compiled with mypyc.
+"""
+import re
+from typing import Pattern, Tuple
+
+# Patterns are lowercase and matched against str.lower() output, which handles Turkish I/i differently
+# from re.IGNORECASE. Each tier is checked in order so earlier tiers win.
+HIGH_PRIORITY_RE: Pattern[str] = re.compile(r"acil|urgent|kopuyor|kilit|down|calismiyor")
+MEDIUM_PRIORITY_RE: Pattern[str] = re.compile(r"yavas|gecik|slow")
+CATEGORY_RES: Tuple[Tuple[str, Pattern[str]], ...] = (
+    ("Internet", re.compile(r"wifi|internet|lms|vpn|modem")),
+    ("Donanim", re.compile(r"projeksiyon|monitor|ekran|donanim|bilgisayar|lab")),
+    ("Ogrenci Islemleri", re.compile(r"randevu|danisman|kayit|transkript|ogrenci")),
+)
+
+
+def priority(text: str) -> str:
+    lowered = text.lower()
+    if HIGH_PRIORITY_RE.search(lowered):
+        return "high"
+    if MEDIUM_PRIORITY_RE.search(lowered):
+        return "medium"
+    return "low"
+
+
+def category(text: str) -> str:
+    lowered = text.lower()
+    for name, pattern in CATEGORY_RES:
+        if pattern.search(lowered):
+            return name
+    return "Genel"
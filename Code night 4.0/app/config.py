@@ -1,4 +1,6 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -7,13 +9,20 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24
     database_url: str = "sqlite:///./campusupport.db"
+    # Async driver URL for the read paths; derived from database_url when unset
+    async_database_url: str | None = None
     ai_api_key: str | None = None
     ai_api_base: str | None = None
     notify_webhook_url: str | None = None
     internal_secret: str = "dev-internal-secret"
+    redis_url: str | None = None
+
+    model_config = SettingsConfigDict(env_file=".env", frozen=True)
+
 
-    class Config:
-        env_file = ".env"
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
@@ -1,14 +1,72 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from .config import settings
 
+# Async drivers used for the read-only request paths
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+_url = make_url(settings.database_url)
+IS_SQLITE = _url.get_backend_name() == "sqlite"
+# Per-process connection budgets; SQLite files keep SQLAlchemy's defaults.
+# Sync handlers run on anyio's 40-thread limiter, so the sync pool never needs more than 40 connections.
+# Together with the async pool that is at most 70 per process, below Postgres' default max_connections=100.
+SERVER_POOL_OPTIONS = {"pool_pre_ping": True, "pool_recycle": 1800}
+SYNC_POOL_OPTIONS = {} if IS_SQLITE else {**SERVER_POOL_OPTIONS, "pool_size": 20, "max_overflow": 20}
+ASYNC_POOL_OPTIONS = {} if IS_SQLITE else {**SERVER_POOL_OPTIONS, "pool_size": 20, "max_overflow": 10}
+
+
+def async_database_target() -> tuple[URL, dict]:
+    """URL and connect_args for the async engine.
+
+    ASYNC_DATABASE_URL wins when set. Otherwise database_url is moved onto the matching async driver, translating the
+    libpq query parameters asyncpg names differently; anything else needs an explicit ASYNC_DATABASE_URL.
+    """
+    if settings.async_database_url:
+        return make_url(settings.async_database_url), {}
+    backend = _url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(
+            f"No async driver known for '{backend}' databases; set ASYNC_DATABASE_URL to an async SQLAlchemy URL"
+        )
+    url = _url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    connect_args = {}
+    if backend == "postgresql":
+        query = dict(url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        if "connect_timeout" in query:
+            connect_args["timeout"] = float(query.pop("connect_timeout"))
+        url = url.set(query=query)
+    return url, connect_args
+
+
 engine = create_engine(
-    settings.database_url, connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+    settings.database_url, connect_args={"check_same_thread": False} if IS_SQLITE else {}, **SYNC_POOL_OPTIONS
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Keep loaded state after commit so handlers can serialize just-written rows without a re-SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
+_async_url, _async_connect_args = async_database_target()
+async_engine = create_async_engine(_async_url, connect_args=_async_connect_args, **ASYNC_POOL_OPTIONS)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets the async readers proceed while a sync handler holds the write lock
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+
 
 def get_db_session():
     db = SessionLocal()
@@ -16,3 +74,8 @@ def get_db_session():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db_session():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,34 +1,75 @@
-from fastapi import Depends, HTTPException, Header, status
-from jose import JWTError, jwt
+import hashlib
+import hmac
+import threading
+import time
+
+import jwt
+from cachetools import TTLCache
+from fastapi import Depends, HTTPException, Header, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import models
 from .auth import oauth2_scheme
 from .config import settings
-from .database import get_db_session
+from .database import get_async_db_session, get_db_session
+
+# Short-lived cache of verified tokens -> resolved user, so repeat requests skip JWT decode and the user lookup
+TOKEN_CACHE_TTL_SECONDS = 10
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL_SECONDS)
+_token_cache_lock = threading.Lock()
+
+# Decode arguments built once instead of per request
+_JWT_KEY = settings.secret_key.encode()
+_JWT_ALGS = (settings.algorithm,)
+_JWT_OPTIONS = {"require": ["exp", "sub"]}
+_INTERNAL_SECRET = settings.internal_secret.encode()
+
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
 
 
 def get_db() -> Session:
     yield from get_db_session()
 
 
+async def get_async_db() -> AsyncSession:
+    async for db in get_async_db_session():
+        yield db
+
+
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cache_key = _token_cache_key(token)
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+    if cached is not None:
+        user, expires_at = cached
+        if expires_at > time.time() and user.is_active:
+            # Hand each request its own session-bound copy so lazy relationships load instead of raising
+            return db.merge(user, load=False)
+
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGS, options=_JWT_OPTIONS)
         user_id = payload.get("sub")
-    except JWTError:
+    except jwt.PyJWTError:
         raise credentials_exception
     if user_id is None:
         raise credentials_exception
     user = db.get(models.User, int(user_id))
     if user is None:
         raise credentials_exception
-    return user
+    # Detach so the cached instance is not expired by this request's commit
+    db.expunge(user)
+    expires_at = min(float(payload.get("exp", 0)), time.time() + TOKEN_CACHE_TTL_SECONDS)
+    with _token_cache_lock:
+        _token_cache[cache_key] = (user, expires_at)
+    return db.merge(user, load=False)
 
 
 def get_current_active_user(current_user: models.User = Depends(get_current_user)) -> models.User:
@@ -38,15 +79,28 @@ def get_current_active_user(current_user: models.User = Depends(get_current_user
 
 
 def require_roles(*roles: models.RoleEnum):
+    allowed = frozenset(roles)
+
     def checker(current_user: models.User = Depends(get_current_active_user)) -> models.User:
-        if current_user.role not in roles:
+        if current_user.role not in allowed:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
         return current_user
 
     return checker
 
 
+def cache_headers(policy: str, vary: str = "Authorization, Origin"):
+    """Set a per-endpoint Cache-Control policy on the response."""
+
+    def setter(response: Response) -> Response:
+        response.headers["Cache-Control"] = policy
+        response.headers["Vary"] = vary
+        return response
+
+    return setter
+
+
 def verify_internal_secret(x_internal_secret: str = Header(None)):
-    if not x_internal_secret or x_internal_secret != settings.internal_secret:
+    if not x_internal_secret or not hmac.compare_digest(x_internal_secret.encode(), _INTERNAL_SECRET):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal secret")
     return True
@@ -1,24 +1,63 @@
+import hashlib
 import logging
-from datetime import date, datetime, timedelta
+import os
+from datetime import date, datetime, time, timedelta, timezone
 from typing import List, Optional
 
 import httpx
-from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, and_, case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 
-from . import auth, models, schemas
+from . import auth, cache, classify, models, schemas
 from .config import settings
-from .database import Base, SessionLocal, engine
-from .dependencies import get_current_active_user, get_db, verify_internal_secret
+from .database import IS_SQLITE, Base, SessionLocal, async_engine, engine
+from .dependencies import cache_headers, get_async_db, get_current_active_user, get_db, verify_internal_secret
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("campusupport")
 
-app = FastAPI(title=settings.app_name, version="0.2.0")
+TICKET_CACHE_POLICY = "private, max-age=5, stale-while-revalidate=30"
+METADATA_CACHE_POLICY = "public, max-age=3600"
+
+# Comments load in a separate IN query so joined ticket rows are not multiplied per comment
+TICKET_LOAD_OPTIONS = (
+    joinedload(models.Ticket.department),
+    joinedload(models.Ticket.assignee),
+    joinedload(models.Ticket.creator),
+    selectinload(models.Ticket.comments).joinedload(models.Comment.author),
+)
+PRIORITY_RANK = case(
+    {
+        models.TicketPriority.high: 3,
+        models.TicketPriority.medium: 2,
+        models.TicketPriority.low: 1,
+    },
+    value=models.Ticket.priority,
+)
+TICKET_SUMMARY_COLUMNS = load_only(
+    models.Ticket.id,
+    models.Ticket.title,
+    models.Ticket.description,
+    models.Ticket.priority,
+    models.Ticket.status,
+    models.Ticket.category,
+    models.Ticket.assigned_unit,
+    models.Ticket.department_id,
+    models.Ticket.assigned_to_id,
+    models.Ticket.created_by_id,
+    models.Ticket.created_at,
+    models.Ticket.updated_at,
+)
+
+app = FastAPI(title=settings.app_name, version="0.2.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,30 +66,54 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0)
 
 
 @app.on_event("startup")
 def startup_event():
     Base.metadata.create_all(bind=engine)
     run_sqlite_migrations()
+    ensure_indexes()
     seed_departments()
-    seed_agent_bot()
+    app.state.bot_user_id = seed_agent_bot()
+    app.state.http = httpx.AsyncClient(timeout=10, limits=HTTP_LIMITS, http2=True)
+    app.state.notify = httpx.Client(timeout=8, limits=HTTP_LIMITS)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.http.aclose()
+    app.state.notify.close()
+    await async_engine.dispose()
 
 
-def seed_departments():
-    """Create default departments if database is empty."""
 def run_sqlite_migrations():
     """Lightweight migration to add new columns on SQLite without Alembic."""
     if "sqlite" not in settings.database_url:
         return
     with engine.begin() as conn:
-        cols = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(tickets)").fetchall()}
-        if "category" not in cols:
+        table_sql = (
+            conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type='table' AND name='tickets'").scalar() or ""
+        )
+        if "category" not in table_sql:
             conn.exec_driver_sql("ALTER TABLE tickets ADD COLUMN category VARCHAR")
-        if "assigned_unit" not in cols:
+        if "assigned_unit" not in table_sql:
             conn.exec_driver_sql("ALTER TABLE tickets ADD COLUMN assigned_unit VARCHAR")
 
 
+def ensure_indexes():
+    """Create model indexes missing from existing tables; create_all only indexes tables it creates."""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def seed_departments():
+    """Create default departments if database is empty."""
     defaults = [
         {"name": "Bilgi Islem", "description": "Teknik destek ve altyapi"},
         {"name": "Yapi Isleri", "description": "Kampus bakim ve fiziksel sorunlar"},
@@ -67,37 +130,53 @@ def run_sqlite_migrations():
         db.close()
 
 
-def seed_agent_bot():
-    """Create a system bot user for agent comments."""
+def seed_agent_bot() -> int:
+    """Create a system bot user for agent comments and return its id."""
     db = SessionLocal()
     try:
-        bot = db.query(models.User).filter(models.User.email == "agent@system.local").first()
-        if not bot:
+        bot_id = db.execute(select(models.User.id).where(models.User.email == "agent@system.local").limit(1)).scalar()
+        if not bot_id:
             bot_user = models.User(
                 email="agent@system.local",
                 full_name="Agent Bot",
-                hashed_password=auth.get_password_hash("agent-system"),
+                hashed_password=auth.get_password_hash("agent-system", bulk=True),
                 role=models.RoleEnum.admin,
                 department_id=None,
             )
             db.add(bot_user)
             db.commit()
+            bot_id = bot_user.id
+        return bot_id
     finally:
         db.close()
 
 
-def build_comment_payload(comment: models.Comment) -> schemas.CommentPublic:
-    return schemas.CommentPublic(
+def agent_bot_user_id(db: Session) -> int:
+    """Bot user id stored by startup; looked up once if the app was started without its lifespan."""
+    bot_id = getattr(app.state, "bot_user_id", None)
+    if bot_id is None:
+        bot_id = db.execute(select(models.User.id).where(models.User.email == "agent@system.local")).scalar()
+        if bot_id is None:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Agent bot user is missing")
+        app.state.bot_user_id = bot_id
+    return bot_id
+
+
+def build_comment_payload(comment: models.Comment, author_email: Optional[str] = None) -> schemas.CommentPublic:
+    if author_email is None:
+        author_email = comment.author.email if comment.author else ""
+    return schemas.CommentPublic.model_construct(
         id=comment.id,
         content=comment.content,
         author_id=comment.author_id,
-        author_email=comment.author.email if comment.author else "",
+        author_email=author_email,
         created_at=comment.created_at,
     )
 
 
 def build_ticket_payload(ticket: models.Ticket) -> schemas.TicketDetailed:
-    return schemas.TicketDetailed(
+    department = ticket.department
+    return schemas.TicketDetailed.model_construct(
         id=ticket.id,
         title=ticket.title,
         description=ticket.description,
@@ -106,8 +185,10 @@ def build_ticket_payload(ticket: models.Ticket) -> schemas.TicketDetailed:
         priority=ticket.priority,
         status=ticket.status,
         department_id=ticket.department_id,
-        department=schemas.DepartmentPublic.model_validate(ticket.department, from_attributes=True)
-        if ticket.department
+        department=schemas.DepartmentPublic.model_construct(
+            id=department.id, name=department.name, description=department.description
+        )
+        if department
         else None,
         assigned_to_id=ticket.assigned_to_id,
         assignee_email=ticket.assignee.email if ticket.assignee else None,
@@ -118,18 +199,73 @@ def build_ticket_payload(ticket: models.Ticket) -> schemas.TicketDetailed:
         first_response_at=ticket.first_response_at,
         resolved_at=ticket.resolved_at,
         closed_at=ticket.closed_at,
-        comments=[build_comment_payload(c) for c in sorted(ticket.comments, key=lambda x: x.created_at)],
+        comments=[build_comment_payload(c) for c in ticket.comments],
+    )
+
+
+def build_ticket_summary(ticket: models.Ticket) -> schemas.TicketPublic:
+    return schemas.TicketPublic.model_construct(
+        id=ticket.id,
+        title=ticket.title,
+        description=ticket.description,
+        priority=ticket.priority,
+        status=ticket.status,
+        category=ticket.category,
+        assigned_unit=ticket.assigned_unit,
+        department_id=ticket.department_id,
+        assigned_to_id=ticket.assigned_to_id,
+        created_by_id=ticket.created_by_id,
+        created_at=ticket.created_at,
+        updated_at=ticket.updated_at,
     )
 
 
-def ensure_ticket_visibility(ticket: models.Ticket, user: models.User):
+def select_ticket_with_relations(ticket_id: int) -> Select:
+    return select(models.Ticket).options(*TICKET_LOAD_OPTIONS).where(models.Ticket.id == ticket_id)
+
+
+def authorized_ticket_query(user: models.User, ticket_id: int) -> Select:
+    """Select the ticket only if the user may see it, so a hidden ticket reads as not found."""
+    query = select(models.Ticket).where(models.Ticket.id == ticket_id)
     if user.role == models.RoleEnum.admin:
-        return
-    if ticket.created_by_id == user.id:
-        return
-    if user.role in {models.RoleEnum.department, models.RoleEnum.support} and user.department_id == ticket.department_id:
-        return
-    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You cannot view this ticket")
+        return query
+    visible = models.Ticket.created_by_id == user.id
+    if user.role in {models.RoleEnum.department, models.RoleEnum.support}:
+        visible = or_(visible, models.Ticket.department_id == user.department_id)
+    return query.where(visible)
+
+
+def _now() -> datetime:
+    """Naive UTC timestamp matching the stored columns; handlers read it once and reuse it."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def invalidate_ticket_caches(ticket: models.Ticket) -> None:
+    cache.invalidate(
+        "tickets:all",
+        f"tickets:dept:{ticket.department_id}",
+        f"tickets:user:{ticket.created_by_id}",
+        f"report:dept:{ticket.department_id}",
+        f"summary:user:{ticket.created_by_id}",
+    )
+
+
+def weak_etag(*parts) -> str:
+    return 'W/"%s"' % hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Attach the ETag and return a 304 response when the client already holds it."""
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in {t.strip() for t in if_none_match.split(",")}):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(response.headers))
+    return None
+
+
+def cached_json_response(value, response: Response) -> ORJSONResponse:
+    """Send an already JSON-ready cached value as-is, skipping response_model validation."""
+    return ORJSONResponse(value, headers=dict(response.headers))
 
 
 @app.get("/")
@@ -149,7 +285,7 @@ def internal_health(_: bool = Depends(verify_internal_secret)):
 
 @app.post("/auth/register", response_model=schemas.UserPublic, status_code=status.HTTP_201_CREATED)
 def register_user(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter(models.User.email == user_in.email).first()
+    existing = db.execute(select(models.User.id).where(models.User.email == user_in.email).limit(1)).scalar()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     if user_in.role in {models.RoleEnum.support, models.RoleEnum.department} and not user_in.department_id:
@@ -165,7 +301,8 @@ def register_user(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
     )
     db.add(user)
     db.commit()
-    db.refresh(user)
+    if user.role == models.RoleEnum.support and user.department_id:
+        cache.invalidate(f"report:dept:{user.department_id}")
     return user
 
 
@@ -173,9 +310,12 @@ def register_user(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
 def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
+    user = db.scalars(select(models.User).where(models.User.email == form_data.username)).first()
     if not user or not auth.verify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    if auth.password_needs_rehash(user.hashed_password):
+        user.hashed_password = auth.get_password_hash(form_data.password)
+        db.commit()
     access_token = auth.create_access_token({"sub": str(user.id), "role": user.role})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -187,40 +327,37 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
 
 
 def simple_priority_guess(text: str) -> models.TicketPriority:
-    lowered = text.lower()
-    if any(k in lowered for k in ["acil", "urgent", "kopuyor", "kilit", "down", "calismiyor"]):
-        return models.TicketPriority.high
-    if any(k in lowered for k in ["yavas", "gecik", "slow"]):
-        return models.TicketPriority.medium
-    return models.TicketPriority.low
+    return models.TicketPriority(classify.priority(text))
 
 
 def simple_category_guess(text: str) -> str:
-    lowered = text.lower()
-    if any(k in lowered for k in ["wifi", "internet", "lms", "vpn", "modem"]):
-        return "Internet"
-    if any(k in lowered for k in ["projeksiyon", "monitor", "ekran", "donanim", "bilgisayar", "lab"]):
-        return "Donanim"
-    if any(k in lowered for k in ["randevu", "danisman", "kayit", "transkript", "ogrenci"]):
-        return "Ogrenci Islemleri"
-    return "Genel"
+    return classify.category(text)
 
 
-async def call_ai_service(prompt: str, purpose: str) -> Optional[str]:
+async def call_ai_service(prompt: str, purpose: str, use_cache: bool = True) -> Optional[str]:
     if not settings.ai_api_key or not settings.ai_api_base:
         logger.info("ai.call.skipped", extra={"purpose": purpose, "reason": "no_api_key"})
         return None
+    cache_key = (hashlib.sha1(" ".join(prompt.lower().split()).encode()).hexdigest(),)
+    if use_cache:
+        hit = await run_in_threadpool(cache.lookup, f"ai:{purpose}", cache_key)
+        if hit is not None:
+            logger.info("ai.call.cached", extra={"purpose": purpose})
+            return hit
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(
-                settings.ai_api_base,
-                headers={"Authorization": f"Bearer {settings.ai_api_key}"},
-                json={"input": prompt, "purpose": purpose},
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            logger.info("ai.call.success", extra={"purpose": purpose})
-            return data.get("result") or data.get("text")
+        resp = await app.state.http.request(
+            "POST",
+            settings.ai_api_base,
+            headers={"Authorization": f"Bearer {settings.ai_api_key}"},
+            json={"input": prompt, "purpose": purpose},
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        logger.info("ai.call.success", extra={"purpose": purpose})
+        result = data.get("result") or data.get("text")
+        if result:
+            await run_in_threadpool(cache.store, f"ai:{purpose}", cache_key, result, cache.AI_TTL)
+        return result
     except Exception as exc:  # noqa: BLE001
         logger.warning("ai.call.failed", extra={"purpose": purpose, "error": str(exc)})
         return None
@@ -240,22 +377,26 @@ def build_reply_stub(text: str) -> str:
     )
 
 
-def send_resolution_notification(ticket: models.Ticket) -> None:
-    if not settings.notify_webhook_url:
-        logger.info("notify.skipped", extra={"ticket_id": ticket.id, "reason": "no_webhook"})
-        return
-    payload = {
+def build_notification_payload(ticket: models.Ticket) -> dict:
+    return {
         "ticket_id": ticket.id,
         "title": ticket.title,
-        "status": ticket.status,
+        "status": ticket.status.value,
         "description": ticket.description,
     }
+
+
+def send_resolution_notification(payload: dict) -> None:
+    ticket_id = payload["ticket_id"]
+    if not settings.notify_webhook_url:
+        logger.info("notify.skipped", extra={"ticket_id": ticket_id, "reason": "no_webhook"})
+        return
     try:
-        resp = httpx.post(settings.notify_webhook_url, json=payload, timeout=8)
+        resp = app.state.notify.post(settings.notify_webhook_url, json=payload)
         resp.raise_for_status()
-        logger.info("notify.sent", extra={"ticket_id": ticket.id})
+        logger.info("notify.sent", extra={"ticket_id": ticket_id})
     except Exception as exc:  # noqa: BLE001
-        logger.warning("notify.failed", extra={"ticket_id": ticket.id, "error": str(exc)})
+        logger.warning("notify.failed", extra={"ticket_id": ticket_id, "error": str(exc)})
 
 
 @app.get("/users/me", response_model=schemas.UserPublic)
@@ -263,9 +404,13 @@ def read_users_me(current_user: models.User = Depends(get_current_active_user)):
     return current_user
 
 
-@app.get("/departments", response_model=List[schemas.DepartmentPublic])
+@app.get(
+    "/departments",
+    response_model=List[schemas.DepartmentPublic],
+    dependencies=[Depends(cache_headers(METADATA_CACHE_POLICY, vary="Origin"))],
+)
 def list_departments(db: Session = Depends(get_db)):
-    return db.query(models.Department).order_by(models.Department.name).all()
+    return db.scalars(select(models.Department).order_by(models.Department.name)).all()
 
 
 @app.get("/departments/{department_id}/supports", response_model=List[schemas.UserPublic])
@@ -278,11 +423,9 @@ def list_support_users(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only department/admin can view support users")
     if current_user.role == models.RoleEnum.department and current_user.department_id != department_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your department")
-    return (
-        db.query(models.User)
-        .filter(models.User.role == models.RoleEnum.support, models.User.department_id == department_id)
-        .all()
-    )
+    return db.scalars(
+        select(models.User).where(models.User.role == models.RoleEnum.support, models.User.department_id == department_id)
+    ).all()
 
 
 @app.post("/tickets", response_model=schemas.TicketDetailed, status_code=status.HTTP_201_CREATED)
@@ -309,7 +452,7 @@ def create_ticket(
     )
     db.add(ticket)
     db.commit()
-    db.refresh(ticket)
+    invalidate_ticket_caches(ticket)
     logger.info("ticket.created", extra={"ticket_id": ticket.id, "created_by": current_user.id})
     return build_ticket_payload(ticket)
 
@@ -321,7 +464,7 @@ async def ai_suggest(payload: schemas.AISuggestRequest):
         "Ticket aciklamasina gore kategori ve oncelik oner: "
         f"{description}\nYanit sadece kategori ve oncelik olsun."
     )
-    ai_result = await call_ai_service(prompt, purpose="suggest")
+    ai_result = await call_ai_service(prompt, purpose="suggest", use_cache=not payload.no_cache)
     suggested_category = ai_result or simple_category_guess(description)
     suggested_priority = simple_priority_guess(description)
     logger.info("ai.suggest", extra={"used_ai": bool(ai_result)})
@@ -329,39 +472,54 @@ async def ai_suggest(payload: schemas.AISuggestRequest):
 
 
 @app.get("/tickets/me", response_model=List[schemas.TicketDetailed])
-def list_my_tickets(current_user: models.User = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    tickets = (
-        db.query(models.Ticket)
-        .filter(models.Ticket.created_by_id == current_user.id)
+async def list_my_tickets(
+    current_user: models.User = Depends(get_current_active_user), db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(
+        select(models.Ticket)
+        .options(*TICKET_LOAD_OPTIONS)
+        .where(models.Ticket.created_by_id == current_user.id)
         .order_by(models.Ticket.created_at.desc())
-        .all()
     )
-    return [build_ticket_payload(t) for t in tickets]
+    return [build_ticket_payload(t) for t in result.scalars()]
 
 
-@app.get("/tickets/{ticket_id}", response_model=schemas.TicketDetailed)
-def get_ticket(ticket_id: int, current_user: models.User = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    ticket = db.get(models.Ticket, ticket_id)
+@app.get(
+    "/tickets/{ticket_id}",
+    response_model=schemas.TicketDetailed,
+    dependencies=[Depends(cache_headers(TICKET_CACHE_POLICY))],
+)
+async def get_ticket(
+    ticket_id: int,
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    query = authorized_ticket_query(current_user, ticket_id).options(*TICKET_LOAD_OPTIONS)
+    ticket = (await db.execute(query)).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
-    ensure_ticket_visibility(ticket, current_user)
+    cached = not_modified(request, response, weak_etag("ticket", ticket.id, ticket.updated_at.isoformat()))
+    if cached:
+        return cached
     return build_ticket_payload(ticket)
 
 
 @app.get("/tickets/{ticket_id}/ai-insights", response_model=schemas.AIInsightResponse)
 async def ticket_ai_insights(
     ticket_id: int,
+    no_cache: bool = False,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    ticket = db.get(models.Ticket, ticket_id)
+    ticket = (await db.execute(authorized_ticket_query(current_user, ticket_id))).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
-    ensure_ticket_visibility(ticket, current_user)
 
     description = ticket.description
     prompt = f"Bu ticket metnini ozetle ve destek personeli icin cevap taslagi oner: {description}"
-    ai_text = await call_ai_service(prompt, purpose="summary")
+    ai_text = await call_ai_service(prompt, purpose="summary", use_cache=not no_cache)
     if ai_text:
         parts = ai_text.split("\n", 1)
         summary = parts[0].strip()
@@ -380,14 +538,13 @@ def update_ticket(
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    ticket = db.get(models.Ticket, ticket_id)
+    query = authorized_ticket_query(current_user, ticket_id).options(*TICKET_LOAD_OPTIONS)
+    ticket = db.execute(query).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
 
     if current_user.role == models.RoleEnum.support:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Support users cannot edit tickets")
-    if current_user.role == models.RoleEnum.student and ticket.created_by_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only edit your tickets")
     if current_user.role == models.RoleEnum.department and ticket.department_id != current_user.department_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your department")
     if ticket.status == models.TicketStatus.closed:
@@ -398,14 +555,15 @@ def update_ticket(
         return build_ticket_payload(ticket)
     for field, value in updates.items():
         setattr(ticket, field, value)
-    ticket.updated_at = datetime.utcnow()
+    ticket.updated_at = _now()
     db.commit()
-    db.refresh(ticket)
+    invalidate_ticket_caches(ticket)
     return build_ticket_payload(ticket)
 
 
-@app.get("/tickets", response_model=List[schemas.TicketDetailed])
+@app.get("/tickets", response_model=List[schemas.TicketPublic])
 def list_tickets(
+    response: Response,
     department_id: Optional[int] = None,
     status_filter: Optional[models.TicketStatus] = Query(default=None, alias="status"),
     priority: Optional[models.TicketPriority] = None,
@@ -413,30 +571,41 @@ def list_tickets(
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    query = db.query(models.Ticket)
+    query = select(models.Ticket).options(TICKET_SUMMARY_COLUMNS)
 
     if current_user.role == models.RoleEnum.student:
-        query = query.filter(models.Ticket.created_by_id == current_user.id)
+        query = query.where(models.Ticket.created_by_id == current_user.id)
+        namespace = f"tickets:user:{current_user.id}"
     elif current_user.role in {models.RoleEnum.department, models.RoleEnum.support}:
-        query = query.filter(models.Ticket.department_id == current_user.department_id)
+        query = query.where(models.Ticket.department_id == current_user.department_id)
+        namespace = f"tickets:dept:{current_user.department_id}"
     elif department_id:
-        query = query.filter(models.Ticket.department_id == department_id)
+        query = query.where(models.Ticket.department_id == department_id)
+        namespace = f"tickets:dept:{department_id}"
+    else:
+        namespace = "tickets:all"
 
     if status_filter:
-        query = query.filter(models.Ticket.status == status_filter)
+        query = query.where(models.Ticket.status == status_filter)
     if priority:
-        query = query.filter(models.Ticket.priority == priority)
+        query = query.where(models.Ticket.priority == priority)
     if order_by_priority:
-        priority_order = {
-            models.TicketPriority.high: 3,
-            models.TicketPriority.medium: 2,
-            models.TicketPriority.low: 1,
-        }
-        query = sorted(query.all(), key=lambda t: priority_order[t.priority], reverse=True)
-        return [build_ticket_payload(t) for t in query]
-
-    tickets = query.order_by(models.Ticket.created_at.desc()).all()
-    return [build_ticket_payload(t) for t in tickets]
+        query = query.order_by(PRIORITY_RANK.desc())
+
+    def load():
+        tickets = db.scalars(query.order_by(models.Ticket.created_at.desc()))
+        return [build_ticket_summary(t) for t in tickets]
+
+    key = (
+        current_user.id,
+        current_user.role,
+        current_user.department_id,
+        department_id,
+        status_filter,
+        priority,
+        order_by_priority,
+    )
+    return cached_json_response(cache.cached(namespace, key, cache.SHORT_TTL, load, response), response)
 
 
 @app.patch("/tickets/{ticket_id}/assign", response_model=schemas.TicketDetailed)
@@ -448,7 +617,7 @@ def assign_ticket(
 ):
     if current_user.role not in {models.RoleEnum.department, models.RoleEnum.admin}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only department/admin can assign tickets")
-    ticket = db.get(models.Ticket, ticket_id)
+    ticket = db.execute(select_ticket_with_relations(ticket_id)).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
     if current_user.role == models.RoleEnum.department and ticket.department_id != current_user.department_id:
@@ -460,10 +629,14 @@ def assign_ticket(
     if support_user.department_id != ticket.department_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Support user is in a different department")
 
+    # Keeps the eagerly loaded assignee in step with the new FK
     ticket.assigned_to_id = support_user.id
-    ticket.assigned_at = datetime.utcnow()
+    ticket.assignee = support_user
+    now = _now()
+    ticket.assigned_at = now
+    ticket.updated_at = now
     db.commit()
-    db.refresh(ticket)
+    invalidate_ticket_caches(ticket)
     return build_ticket_payload(ticket)
 
 
@@ -471,10 +644,12 @@ def assign_ticket(
 def update_ticket_status(
     ticket_id: int,
     payload: schemas.TicketStatusUpdate,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    ticket = db.get(models.Ticket, ticket_id)
+    query = authorized_ticket_query(current_user, ticket_id).options(*TICKET_LOAD_OPTIONS)
+    ticket = db.execute(query).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
 
@@ -487,7 +662,7 @@ def update_ticket_status(
     elif current_user.role == models.RoleEnum.student:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Students cannot change status")
 
-    now = datetime.utcnow()
+    now = _now()
     ticket.status = payload.status
     ticket.updated_at = now
     if payload.status == models.TicketStatus.in_progress and ticket.first_response_at is None:
@@ -497,9 +672,9 @@ def update_ticket_status(
     if payload.status == models.TicketStatus.closed:
         ticket.closed_at = now
     db.commit()
-    db.refresh(ticket)
+    invalidate_ticket_caches(ticket)
     if payload.status == models.TicketStatus.resolved:
-        send_resolution_notification(ticket)
+        background_tasks.add_task(send_resolution_notification, build_notification_payload(ticket))
     return build_ticket_payload(ticket)
 
 
@@ -509,7 +684,7 @@ def delete_ticket(
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    ticket = db.get(models.Ticket, ticket_id)
+    ticket = db.execute(authorized_ticket_query(current_user, ticket_id)).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
 
@@ -528,6 +703,7 @@ def delete_ticket(
 
     db.delete(ticket)
     db.commit()
+    invalidate_ticket_caches(ticket)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -538,38 +714,55 @@ def add_comment(
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    ticket = db.get(models.Ticket, ticket_id)
+    ticket = db.execute(authorized_ticket_query(current_user, ticket_id)).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
-    try:
-        ensure_ticket_visibility(ticket, current_user)
-    except HTTPException as exc:
-        if exc.status_code == status.HTTP_403_FORBIDDEN:
-            raise
-        raise
-
-    comment = models.Comment(ticket_id=ticket_id, author_id=current_user.id, content=payload.content)
-    ticket.updated_at = datetime.utcnow()
+
+    now = _now()
+    comment = models.Comment(ticket_id=ticket_id, author_id=current_user.id, content=payload.content, created_at=now)
+    ticket.updated_at = now
     if current_user.role == models.RoleEnum.support and ticket.first_response_at is None:
-        ticket.first_response_at = datetime.utcnow()
+        ticket.first_response_at = now
     db.add(comment)
     db.commit()
-    db.refresh(comment)
-    db.refresh(ticket)
-    return build_comment_payload(comment)
+    invalidate_ticket_caches(ticket)
+    return build_comment_payload(comment, author_email=current_user.email)
 
 
-@app.get("/tickets/{ticket_id}/comments", response_model=List[schemas.CommentPublic])
+@app.get(
+    "/tickets/{ticket_id}/comments",
+    response_model=List[schemas.CommentPublic],
+    dependencies=[Depends(cache_headers(TICKET_CACHE_POLICY))],
+)
 def list_comments(
     ticket_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    ticket = db.get(models.Ticket, ticket_id)
+    ticket = db.execute(authorized_ticket_query(current_user, ticket_id)).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
-    ensure_ticket_visibility(ticket, current_user)
-    comments = db.query(models.Comment).filter(models.Comment.ticket_id == ticket_id).order_by(models.Comment.created_at).all()
+    # Adding a comment bumps ticket.updated_at, so it versions the thread without loading it
+    etag = weak_etag("comments", ticket.id, ticket.updated_at.isoformat(), limit, offset)
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+    comments = db.scalars(
+        select(models.Comment)
+        .options(joinedload(models.Comment.author))
+        .where(models.Comment.ticket_id == ticket_id)
+        .order_by(models.Comment.created_at, models.Comment.id)
+        .offset(offset)
+        .limit(limit + 1)
+    ).all()
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_url = request.url.include_query_params(limit=limit, offset=offset + limit)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
     return [build_comment_payload(c) for c in comments]
 
 
@@ -579,7 +772,7 @@ def internal_get_ticket(
     _: bool = Depends(verify_internal_secret),
     db: Session = Depends(get_db),
 ):
-    ticket = db.get(models.Ticket, ticket_id)
+    ticket = db.execute(select_ticket_with_relations(ticket_id)).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
     return build_ticket_payload(ticket)
@@ -588,22 +781,25 @@ def internal_get_ticket(
 @app.get("/internal/users/{user_id}/tickets/summary")
 def internal_user_summary(
     user_id: int,
+    response: Response,
     _: bool = Depends(verify_internal_secret),
     db: Session = Depends(get_db),
 ):
-    total = db.query(models.Ticket).filter(models.Ticket.created_by_id == user_id).count()
-    recent = (
-        db.query(models.Ticket)
-        .filter(models.Ticket.created_by_id == user_id)
-        .order_by(models.Ticket.created_at.desc())
-        .limit(2)
-        .all()
-    )
-    return {
-        "total": total,
-        "recent_ids": [t.id for t in recent],
-        "recent_titles": [t.title for t in recent],
-    }
+    def load():
+        # The window count is evaluated before LIMIT, so every row carries the full total
+        recent = db.execute(
+            select(models.Ticket.id, models.Ticket.title, func.count().over().label("total"))
+            .where(models.Ticket.created_by_id == user_id)
+            .order_by(models.Ticket.created_at.desc())
+            .limit(2)
+        ).all()
+        return {
+            "total": recent[0].total if recent else 0,
+            "recent_ids": [t.id for t in recent],
+            "recent_titles": [t.title for t in recent],
+        }
+
+    return cache.cached(f"summary:user:{user_id}", (user_id,), cache.NORMAL_TTL, load, response)
 
 
 @app.post("/internal/tickets/{ticket_id}/agent-update", response_model=schemas.TicketDetailed)
@@ -613,7 +809,7 @@ def internal_agent_update(
     _: bool = Depends(verify_internal_secret),
     db: Session = Depends(get_db),
 ):
-    ticket = db.get(models.Ticket, ticket_id)
+    ticket = db.execute(select_ticket_with_relations(ticket_id)).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
 
@@ -624,20 +820,74 @@ def internal_agent_update(
         ticket.category = updates["category"]
     if "assigned_unit" in updates:
         ticket.assigned_unit = updates["assigned_unit"]
-    ticket.updated_at = datetime.utcnow()
+    ticket.updated_at = _now()
 
-    bot_user = db.query(models.User).filter(models.User.email == "agent@system.local").first()
-    if payload.message and bot_user:
-        comment = models.Comment(ticket_id=ticket_id, author_id=bot_user.id, content=payload.message)
-        db.add(comment)
+    if payload.message:
+        ticket.comments.append(models.Comment(author_id=agent_bot_user_id(db), content=payload.message))
     db.commit()
-    db.refresh(ticket)
+    invalidate_ticket_caches(ticket)
     return build_ticket_payload(ticket)
 
 
+def minutes_between(start, end):
+    """SQL expression for (end - start) in minutes; NULL when either side is NULL."""
+    if IS_SQLITE:
+        # julianday() is a float day count with ~40us of error; rounding to whole milliseconds makes it exact again
+        return func.round((func.julianday(end) - func.julianday(start)) * 86400, 3) / 60
+    return func.extract("epoch", end - start) / 60
+
+
+def build_department_report(db: Session, department_id: int, start_date: date, week_end: date) -> schemas.DepartmentReport:
+    ticket = models.Ticket
+    start_point = func.coalesce(ticket.assigned_at, ticket.created_at)
+    resolution_minutes = minutes_between(start_point, ticket.resolved_at)
+    closed_this_week = case(
+        (
+            and_(
+                ticket.resolved_at >= datetime.combine(start_date, time.min),
+                ticket.resolved_at < datetime.combine(week_end, time.min),
+                ticket.status.in_([models.TicketStatus.resolved, models.TicketStatus.closed]),
+            ),
+            1,
+        )
+    )
+    open_assigned = case((ticket.status.in_([models.TicketStatus.open, models.TicketStatus.in_progress]), 1))
+
+    rows = db.execute(
+        select(
+            models.User.id,
+            models.User.email,
+            func.count(closed_this_week),
+            func.count(open_assigned),
+            func.avg(minutes_between(start_point, ticket.first_response_at)),
+            func.min(resolution_minutes),
+            func.max(resolution_minutes),
+        )
+        .outerjoin(ticket, ticket.assigned_to_id == models.User.id)
+        .where(models.User.role == models.RoleEnum.support, models.User.department_id == department_id)
+        .group_by(models.User.id, models.User.email)
+        .order_by(models.User.id)
+    ).all()
+
+    report_items = [
+        schemas.SupportReport(
+            support_user_id=support_id,
+            support_email=email,
+            closed_this_week=closed,
+            open_assigned=open_count,
+            average_response_minutes=avg_response,
+            fastest_resolution_minutes=fastest,
+            slowest_resolution_minutes=slowest,
+        )
+        for support_id, email, closed, open_count, avg_response, fastest, slowest in rows
+    ]
+    return schemas.DepartmentReport(department_id=department_id, week_start=start_date, week_end=week_end, supports=report_items)
+
+
 @app.get("/departments/{department_id}/report", response_model=schemas.DepartmentReport)
 def department_report(
     department_id: int,
+    response: Response,
     week_start: Optional[date] = Query(default=None, description="Week start date (YYYY-MM-DD)"),
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
@@ -651,60 +901,41 @@ def department_report(
     if not department:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Department not found")
 
-    start_date = week_start or (datetime.utcnow().date() - timedelta(days=7))
+    start_date = week_start or (_now().date() - timedelta(days=7))
     week_end = start_date + timedelta(days=7)
-
-    supports = (
-        db.query(models.User)
-        .filter(models.User.role == models.RoleEnum.support, models.User.department_id == department_id)
-        .all()
+    report = cache.cached(
+        f"report:dept:{department_id}",
+        (start_date.isoformat(),),
+        cache.LONG_TTL,
+        lambda: build_department_report(db, department_id, start_date, week_end),
+        response,
     )
+    return cached_json_response(report, response)
 
-    report_items: List[schemas.SupportReport] = []
-    for support in supports:
-        tickets = (
-            db.query(models.Ticket)
-            .filter(models.Ticket.assigned_to_id == support.id)
-            .all()
-        )
-        closed = [
-            t
-            for t in tickets
-            if t.resolved_at
-            and start_date <= t.resolved_at.date() < week_end
-            and t.status in {models.TicketStatus.resolved, models.TicketStatus.closed}
-        ]
-        open_assigned = [
-            t for t in tickets if t.status in {models.TicketStatus.open, models.TicketStatus.in_progress}
-        ]
-
-        response_times = []
-        resolution_times = []
-        for t in tickets:
-            start_point = t.assigned_at or t.created_at
-            if t.first_response_at and start_point:
-                response_times.append((t.first_response_at - start_point).total_seconds() / 60)
-            if t.resolved_at and start_point:
-                resolution_times.append((t.resolved_at - start_point).total_seconds() / 60)
-
-        report_items.append(
-            schemas.SupportReport(
-                support_user_id=support.id,
-                support_email=support.email,
-                closed_this_week=len(closed),
-                open_assigned=len(open_assigned),
-                average_response_minutes=sum(response_times) / len(response_times) if response_times else None,
-                fastest_resolution_minutes=min(resolution_times) if resolution_times else None,
-                slowest_resolution_minutes=max(resolution_times) if resolution_times else None,
-            )
-        )
 
-    return schemas.DepartmentReport(department_id=department_id, week_start=start_date, week_end=week_end, supports=report_items)
+FRONTEND_HTML_CACHE_POLICY = "no-cache"
+FRONTEND_ASSET_CACHE_POLICY = "public, max-age=86400"
+
+
+def frontend_cache_headers(response: Response, path) -> Response:
+    is_html = str(path).endswith(".html")
+    response.headers["Cache-Control"] = FRONTEND_HTML_CACHE_POLICY if is_html else FRONTEND_ASSET_CACHE_POLICY
+    # GZipMiddleware may re-encode the body, so the shared validator must be weak (RFC 9110 8.8.1)
+    etag = response.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        response.headers["ETag"] = f"W/{etag}"
+    return response
+
+
+class FrontendStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        return frontend_cache_headers(super().file_response(full_path, stat_result, scope, status_code), full_path)
 
 
-app.mount("/frontend", StaticFiles(directory="frontend", html=True), name="frontend")
+app.mount("/frontend", FrontendStaticFiles(directory="frontend", html=True), name="frontend")
 
 
 @app.get("/frontend")
 def serve_frontend():
-    return FileResponse("frontend/index.html")
+    path = "frontend/index.html"
+    return frontend_cache_headers(FileResponse(path, stat_result=os.stat(path)), path)
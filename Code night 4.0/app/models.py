@@ -7,6 +7,7 @@ from sqlalchemy import (
     DateTime,
     Enum as SAEnum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -63,6 +64,8 @@ class User(Base):
     assigned_tickets = relationship("Ticket", back_populates="assignee", foreign_keys="Ticket.assigned_to_id")
     comments = relationship("Comment", back_populates="author")
 
+    __table_args__ = (Index("ix_users_role_dept", "role", "department_id"),)
+
 
 class Ticket(Base):
     __tablename__ = "tickets"
@@ -87,7 +90,14 @@ class Ticket(Base):
     department = relationship("Department", back_populates="tickets")
     creator = relationship("User", foreign_keys=[created_by_id], back_populates="created_tickets")
     assignee = relationship("User", foreign_keys=[assigned_to_id], back_populates="assigned_tickets")
-    comments = relationship("Comment", back_populates="ticket", cascade="all, delete")
+    comments = relationship("Comment", back_populates="ticket", cascade="all, delete", order_by="(Comment.created_at, Comment.id)")
+
+    __table_args__ = (
+        # Postgres keeps title in the index so the user summary can be answered from it alone
+        Index("ix_tickets_creator_created", "created_by_id", "created_at", postgresql_include=["title"]),
+        Index("ix_tickets_dept_status_created", "department_id", "status", "created_at"),
+        Index("ix_tickets_assigned_resolved", "assigned_to_id", "resolved_at"),
+    )
 
 
 class Comment(Base):
@@ -101,3 +111,5 @@ class Comment(Base):
 
     ticket = relationship("Ticket", back_populates="comments")
     author = relationship("User", back_populates="comments")
+
+    __table_args__ = (Index("ix_comments_ticket_created", "ticket_id", "created_at"),)
@@ -112,6 +112,7 @@ class TicketDetailed(TicketPublic):
 
 class AISuggestRequest(BaseModel):
     description: str = Field(min_length=4)
+    no_cache: bool = Field(default=False, description="Skip cached AI results and call the model again")
 
 
 class AISuggestResponse(BaseModel):
@@ -1,11 +1,27 @@
 import os
-from typing import Dict
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
 
 os.environ["DATABASE_URL"] = "sqlite:///./test_campusupport.db"
 
+import jwt  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+from sqlalchemy.orm import raiseload  # noqa: E402
 
-from app.main import app, Base, engine, seed_departments  # noqa: E402
+from app import auth, dependencies, models  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.main import (  # noqa: E402
+    TICKET_LOAD_OPTIONS,
+    app,
+    Base,
+    build_ticket_payload,
+    engine,
+    seed_departments,
+    simple_category_guess,
+    simple_priority_guess,
+)
 from app.database import SessionLocal  # noqa: E402
 
 
@@ -15,11 +31,11 @@ def setup_module():
     seed_departments()
 
 
-def register_and_login(email: str, password: str) -> str:
+def register_and_login(email: str, password: str, role: str = "student", department_id: Optional[int] = None) -> str:
     client = TestClient(app)
     client.post(
         "/auth/register",
-        json={"email": email, "password": password, "role": "student"},
+        json={"email": email, "password": password, "role": role, "department_id": department_id},
     )
     res = client.post("/auth/token", data={"username": email, "password": password})
     assert res.status_code == 200
@@ -63,6 +79,22 @@ def test_ai_suggestion_stub():
     assert "suggested_category" in data
 
 
+def test_keyword_guess_tiers():
+    # high keywords win over medium ones regardless of position; categories follow declaration order
+    assert simple_priority_guess("Sistem YAVAS ve sonra DOWN oldu") == "high"
+    assert simple_priority_guess("lms cok yavas") == "medium"
+    assert simple_priority_guess("bir sorum var") == "low"
+    assert simple_category_guess("lab bilgisayarinda wifi yok") == "Internet"
+    assert simple_category_guess("Transkript talebi") == "Ogrenci Islemleri"
+    assert simple_category_guess("kapi kirik") == "Genel"
+    # str.lower() semantics: dotted/dotless Turkish I do not fold onto the ASCII keywords
+    assert simple_priority_guess("ACİL") == "low"
+    assert simple_priority_guess("acıl") == "low"
+    assert simple_priority_guess("ACIL") == "high"
+    assert simple_category_guess("wıfı") == "Genel"
+    assert simple_category_guess("İnternet") == "Genel"
+
+
 def test_ai_insights_stub():
     token = register_and_login("student2@test.com", "Pass123!")
     client = TestClient(app)
@@ -84,3 +116,335 @@ def test_ai_insights_stub():
     data = res.json()
     assert "summary" in data and data["summary"]
     assert "draft_reply" in data and data["draft_reply"]
+
+
+def test_ticket_comments_are_ordered():
+    token = register_and_login("student3@test.com", "Pass123!")
+    client = TestClient(app)
+    res = client.post(
+        "/tickets",
+        headers=auth_headers(token),
+        json={"title": "Kayit", "description": "kayit sorunu", "department_id": 3},
+    )
+    assert res.status_code == 201
+    ticket_id = res.json()["id"]
+    for content in ["ilk", "ikinci", "ucuncu"]:
+        res = client.post(f"/tickets/{ticket_id}/comments", headers=auth_headers(token), json={"content": content})
+        assert res.status_code == 201
+
+    res = client.get(f"/tickets/{ticket_id}", headers=auth_headers(token))
+    assert res.status_code == 200
+    assert [c["content"] for c in res.json()["comments"]] == ["ilk", "ikinci", "ucuncu"]
+
+
+def test_list_tickets_ordered_by_priority():
+    token = register_and_login("student4@test.com", "Pass123!")
+    client = TestClient(app)
+    for title, priority in [("dusuk", "low"), ("yuksek", "high"), ("orta", "medium")]:
+        res = client.post(
+            "/tickets",
+            headers=auth_headers(token),
+            json={"title": title, "description": "sira testi", "department_id": 2, "priority": priority},
+        )
+        assert res.status_code == 201
+
+    res = client.get("/tickets", headers=auth_headers(token), params={"order_by_priority": True})
+    assert res.status_code == 200
+    assert [t["priority"] for t in res.json()] == ["high", "medium", "low"]
+
+
+def test_ticket_detail_conditional_get():
+    token = register_and_login("student5@test.com", "Pass123!")
+    client = TestClient(app)
+    res = client.post(
+        "/tickets",
+        headers=auth_headers(token),
+        json={"title": "Monitor", "description": "monitor titriyor", "department_id": 1},
+    )
+    ticket_id = res.json()["id"]
+
+    res = client.get(f"/tickets/{ticket_id}", headers=auth_headers(token))
+    assert res.status_code == 200
+    assert res.headers["cache-control"].startswith("private")
+    etag = res.headers["etag"]
+
+    res = client.get(f"/tickets/{ticket_id}", headers={**auth_headers(token), "If-None-Match": etag})
+    assert res.status_code == 304
+
+    client.post(f"/tickets/{ticket_id}/comments", headers=auth_headers(token), json={"content": "guncel"})
+    res = client.get(f"/tickets/{ticket_id}", headers={**auth_headers(token), "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
+
+
+def test_ticket_list_cache_invalidated_on_update():
+    token = register_and_login("student6@test.com", "Pass123!")
+    client = TestClient(app)
+    res = client.post(
+        "/tickets",
+        headers=auth_headers(token),
+        json={"title": "Eski baslik", "description": "vpn baglanmiyor", "department_id": 1},
+    )
+    ticket_id = res.json()["id"]
+    assert [t["title"] for t in client.get("/tickets", headers=auth_headers(token)).json()] == ["Eski baslik"]
+
+    res = client.patch(f"/tickets/{ticket_id}", headers=auth_headers(token), json={"title": "Yeni baslik"})
+    assert res.status_code == 200
+    assert [t["title"] for t in client.get("/tickets", headers=auth_headers(token)).json()] == ["Yeni baslik"]
+
+
+def create_tickets_with_comments(client: TestClient, token: str, count: int):
+    for i in range(count):
+        res = client.post(
+            "/tickets",
+            headers=auth_headers(token),
+            json={"title": f"Yazici {i}", "description": "yazici calismiyor", "department_id": 1},
+        )
+        assert res.status_code == 201
+        client.post(f"/tickets/{res.json()['id']}/comments", headers=auth_headers(token), json={"content": "bekliyorum"})
+
+
+def test_list_tickets_query_count_is_constant():
+    token = register_and_login("student7@test.com", "Pass123!")
+    client = TestClient(app)
+    create_tickets_with_comments(client, token, 3)
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        res = client.get("/tickets", headers=auth_headers(token))
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    assert res.status_code == 200
+    assert len(res.json()) == 3
+    assert len(statements) <= 3, statements
+
+
+def test_ticket_payload_needs_no_lazy_loads():
+    token = register_and_login("student8@test.com", "Pass123!")
+    create_tickets_with_comments(TestClient(app), token, 2)
+
+    # raiseload turns any relationship not covered by TICKET_LOAD_OPTIONS into an error
+    with SessionLocal() as db:
+        tickets = db.scalars(select(models.Ticket).options(*TICKET_LOAD_OPTIONS, raiseload("*"))).unique().all()
+        assert tickets
+        for ticket in tickets:
+            build_ticket_payload(ticket)
+
+
+def test_other_students_ticket_is_not_found():
+    owner = register_and_login("student9@test.com", "Pass123!")
+    other = register_and_login("student10@test.com", "Pass123!")
+    client = TestClient(app)
+    res = client.post(
+        "/tickets",
+        headers=auth_headers(owner),
+        json={"title": "Ozel", "description": "sifre sifirlama", "department_id": 1},
+    )
+    ticket_id = res.json()["id"]
+
+    assert client.get(f"/tickets/{ticket_id}", headers=auth_headers(other)).status_code == 404
+    res = client.post(f"/tickets/{ticket_id}/comments", headers=auth_headers(other), json={"content": "merhaba"})
+    assert res.status_code == 404
+    assert client.patch(f"/tickets/{ticket_id}", headers=auth_headers(other), json={"title": "x"}).status_code == 404
+    assert client.get(f"/tickets/{ticket_id}", headers=auth_headers(owner)).status_code == 200
+
+
+def test_list_comments_is_paginated():
+    token = register_and_login("student11@test.com", "Pass123!")
+    client = TestClient(app)
+    res = client.post(
+        "/tickets",
+        headers=auth_headers(token),
+        json={"title": "Uzun konu", "description": "sinav sonucu", "department_id": 3},
+    )
+    ticket_id = res.json()["id"]
+    for i in range(3):
+        client.post(f"/tickets/{ticket_id}/comments", headers=auth_headers(token), json={"content": f"yorum {i}"})
+
+    res = client.get(f"/tickets/{ticket_id}/comments", headers=auth_headers(token), params={"limit": 2})
+    assert res.status_code == 200
+    assert [c["content"] for c in res.json()] == ["yorum 0", "yorum 1"]
+    assert 'rel="next"' in res.headers["link"] and "offset=2" in res.headers["link"]
+
+    res = client.get(f"/tickets/{ticket_id}/comments", headers=auth_headers(token), params={"limit": 2, "offset": 2})
+    assert [c["content"] for c in res.json()] == ["yorum 2"]
+    assert "link" not in res.headers
+
+
+def test_frontend_pages_revalidate():
+    client = TestClient(app)
+    res = client.get("/frontend/index.html")
+    assert res.status_code == 200
+    assert res.headers["cache-control"] == "no-cache"
+    assert res.headers["etag"].startswith("W/")
+    res = client.get("/frontend/index.html", headers={"If-None-Match": res.headers["etag"]})
+    assert res.status_code == 304
+    assert res.headers["etag"].startswith("W/")
+
+
+def test_department_report_aggregates_per_support():
+    manager = register_and_login("manager2@test.com", "Pass123!", role="department", department_id=2)
+    register_and_login("support-busy@test.com", "Pass123!", role="support", department_id=2)
+    register_and_login("support-idle@test.com", "Pass123!", role="support", department_id=2)
+    week_start = datetime(2026, 1, 5)
+    opened = week_start + timedelta(days=1, hours=10)
+    with SessionLocal() as db:
+        busy = db.scalars(select(models.User).where(models.User.email == "support-busy@test.com")).one()
+        common = {"description": "rapor", "department_id": 2, "created_by_id": busy.id, "assigned_to_id": busy.id}
+        db.add_all(
+            [
+                models.Ticket(
+                    title="hizli",
+                    status=models.TicketStatus.resolved,
+                    created_at=opened,
+                    assigned_at=opened,
+                    first_response_at=opened + timedelta(minutes=5),
+                    resolved_at=opened + timedelta(minutes=7),
+                    **common,
+                ),
+                models.Ticket(
+                    title="yavas",
+                    status=models.TicketStatus.closed,
+                    created_at=opened,
+                    assigned_at=opened,
+                    first_response_at=opened + timedelta(minutes=15),
+                    resolved_at=opened + timedelta(minutes=4508),
+                    **common,
+                ),
+                models.Ticket(title="acik", status=models.TicketStatus.in_progress, created_at=opened, **common),
+            ]
+        )
+        db.commit()
+
+    res = TestClient(app).get(
+        "/departments/2/report", headers=auth_headers(manager), params={"week_start": week_start.date().isoformat()}
+    )
+    assert res.status_code == 200, res.text
+    supports = {s["support_email"]: s for s in res.json()["supports"]}
+    busy_report = supports["support-busy@test.com"]
+    assert busy_report["closed_this_week"] == 2
+    assert busy_report["open_assigned"] == 1
+    assert busy_report["average_response_minutes"] == 10.0
+    assert busy_report["fastest_resolution_minutes"] == 7.0
+    assert busy_report["slowest_resolution_minutes"] == 4508.0
+    idle_report = supports["support-idle@test.com"]
+    assert (idle_report["closed_this_week"], idle_report["open_assigned"]) == (0, 0)
+    assert idle_report["average_response_minutes"] is None
+    assert idle_report["fastest_resolution_minutes"] is None
+    assert idle_report["slowest_resolution_minutes"] is None
+
+
+def token_claims(token: str) -> dict:
+    return jwt.decode(token, options={"verify_signature": False})
+
+
+def count_user_selects(client: TestClient, token: str) -> int:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = client.get("/tickets", headers=auth_headers(token))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert res.status_code == 200
+    return len(statements)
+
+
+def test_token_cache_skips_user_lookup():
+    token = register_and_login("student12@test.com", "Pass123!")
+    client = TestClient(app)
+    dependencies._token_cache.clear()
+    assert count_user_selects(client, token) == 1
+    assert count_user_selects(client, token) == 0
+
+
+def test_invalid_tokens_are_rejected_and_not_cached():
+    token = register_and_login("student13@test.com", "Pass123!")
+    user_id = token_claims(token)["sub"]
+    tampered = token[:-2] + ("AA" if token[-2:] != "AA" else "BB")
+    expired = auth.create_access_token({"sub": user_id}, expires_delta=timedelta(seconds=-30))
+    client = TestClient(app)
+    dependencies._token_cache.clear()
+    for bad in (tampered, expired):
+        assert client.get("/tickets", headers=auth_headers(bad)).status_code == 401
+        assert dependencies._token_cache_key(bad) not in dependencies._token_cache
+    assert len(dependencies._token_cache) == 0
+
+
+def test_token_cache_entry_expires_at_token_exp_or_ttl():
+    token = register_and_login("student14@test.com", "Pass123!")
+    user_id = token_claims(token)["sub"]
+    short_lived = auth.create_access_token({"sub": user_id}, expires_delta=timedelta(seconds=3))
+    client = TestClient(app)
+    dependencies._token_cache.clear()
+
+    before = time.time()
+    count_user_selects(client, token)
+    count_user_selects(client, short_lived)
+    after = time.time()
+    _, long_expiry = dependencies._token_cache[dependencies._token_cache_key(token)]
+    _, short_expiry = dependencies._token_cache[dependencies._token_cache_key(short_lived)]
+    ttl = dependencies.TOKEN_CACHE_TTL_SECONDS
+    assert before + ttl <= long_expiry <= after + ttl
+    assert short_expiry == token_claims(short_lived)["exp"]
+
+    # An entry past its expiry is ignored and the user is looked up again
+    key = dependencies._token_cache_key(token)
+    user, _ = dependencies._token_cache[key]
+    dependencies._token_cache[key] = (user, time.time() - 1)
+    assert count_user_selects(client, token) == 1
+
+
+def test_cached_user_can_load_relationships():
+    token = register_and_login("support-rel@test.com", "Pass123!", role="support", department_id=1)
+    dependencies._token_cache.clear()
+    for _ in range(2):
+        with SessionLocal() as db:
+            user = dependencies.get_current_user(db=db, token=token)
+            assert user.department.id == 1
+
+
+def test_agent_update_adds_bot_comment():
+    token = register_and_login("student15@test.com", "Pass123!")
+    with TestClient(app) as client:
+        res = client.post(
+            "/tickets",
+            headers=auth_headers(token),
+            json={"title": "Agent", "description": "eduroam baglanmiyor", "department_id": 1},
+        )
+        ticket_id = res.json()["id"]
+        client.post(f"/tickets/{ticket_id}/comments", headers=auth_headers(token), json={"content": "acil lutfen"})
+
+        res = client.post(
+            f"/internal/tickets/{ticket_id}/agent-update",
+            headers={"X-Internal-Secret": settings.internal_secret},
+            json={"priority": "high", "message": "Network birimine yonlendirildi"},
+        )
+    assert res.status_code == 200, res.text
+    data = res.json()
+    assert data["priority"] == "high"
+    assert [c["content"] for c in data["comments"]] == ["acil lutfen", "Network birimine yonlendirildi"]
+    assert data["comments"][-1]["author_email"] == "agent@system.local"
+
+
+def test_login_rehashes_legacy_pbkdf2_password():
+    legacy_hash = auth.pwd_context.handler("pbkdf2_sha256").hash("Pass123!")
+    with SessionLocal() as db:
+        db.add(models.User(email="legacy@test.com", hashed_password=legacy_hash, role=models.RoleEnum.student))
+        db.commit()
+
+    res = TestClient(app).post("/auth/token", data={"username": "legacy@test.com", "password": "Pass123!"})
+    assert res.status_code == 200
+    with SessionLocal() as db:
+        stored = db.scalars(select(models.User.hashed_password).where(models.User.email == "legacy@test.com")).one()
+    assert stored.startswith("$argon2id$")
+    assert auth.verify_password("Pass123!", stored)